@@ -3,26 +3,108 @@
 # This app will fall back to the included sample data if your cleaned file is not present.
 
 import os
+import functools
 import pandas as pd
 import numpy as np
+from pandas.api.types import union_categoricals
 from datetime import datetime
-from dash import Dash, dcc, html, Input, Output, State
+from dash import Dash, dcc, html, Input, Output, State, ctx, no_update
 from dash.exceptions import PreventUpdate
 from dash import dash_table
-import plotly.express as px
+import plotly.graph_objects as go
 import dash_bootstrap_components as dbc
 
+try:
+    # Optional: multithreaded CSV parsing straight into the column types below
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pacsv = None
+
+try:
+    # Optional: Modin parses large CSVs across all cores (pick the engine with MODIN_ENGINE=ray or dask)
+    import modin.pandas as mpd
+    from modin.utils import to_pandas as modin_to_pandas
+except ImportError:
+    mpd = None
+
 BASE_DIR = os.path.dirname(__file__)
 DATA_PATH = os.path.join(BASE_DIR, "data", "cleaned_sales.csv")
 SAMPLE_PATH = os.path.join(BASE_DIR, "data", "cleaned_sales_sample.csv")
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Dtypes applied while parsing (columns missing from the file are ignored). Only NA-safe
+# dtypes here: an int hint would make one blank cell fail the whole read; quantity is
+# downcast in load_data instead.
+CSV_DTYPES = {"country": "category", "category": "category", "product_name": "category",
+              "order_id": "category", "product_id": "category", "price": "float32"}
+# Files above this size go through Modin when installed, else pyarrow's streaming reader
+# (ARROW_BLOCK_BYTES per block), else the C parser in CSV_CHUNK_ROWS chunks
+LARGE_CSV_BYTES = 256 * 1024 * 1024
+ARROW_BLOCK_BYTES = 16 * 1024 * 1024
+CSV_CHUNK_ROWS = 1_000_000
+WEEKDAY_NAMES = np.array(["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"])
+
+def read_sales_csv(path):
+    options = dict(parse_dates=["order_date"], date_format=DATE_FORMAT, dtype=CSV_DTYPES)
+    if os.path.getsize(path) > LARGE_CSV_BYTES:
+        if mpd is not None:
+            # Parallel parse, then hand a plain pandas frame to the rest of the app
+            return modin_to_pandas(mpd.read_csv(path, **options))
+        if pacsv is not None:
+            try:
+                return read_csv_arrow(path, stream=True)
+            except pa.ArrowInvalid:
+                # The streaming reader fixes column types from the first block; a later
+                # block that doesn't fit (e.g. a decimal in an integer-looking column) can't
+                # be converted, so fall back to the C parser, which widens types per chunk
+                pass
+        return read_csv_chunked(path, options)
+    if pacsv is not None:
+        return read_csv_arrow(path)
+    return pd.read_csv(path, **options)
+
+def arrow_convert_options():
+    # CSV_DTYPES as Arrow types: categoricals become dictionary-encoded strings, which
+    # to_pandas turns into categoricals. Dates in another format stay strings and fall
+    # through to the to_datetime fallback in load_data.
+    column_types = {col: pa.dictionary(pa.int32(), pa.string()) if dtype == "category" else pa.from_numpy_dtype(np.dtype(dtype))
+                    for col, dtype in CSV_DTYPES.items()}
+    # strings_can_be_null: blank text cells become NaN, as with the pandas parsers, not ''
+    return pacsv.ConvertOptions(column_types=column_types, timestamp_parsers=[DATE_FORMAT], strings_can_be_null=True)
+
+def read_csv_arrow(path, stream=False):
+    # pyarrow.csv directly rather than read_csv(engine="pyarrow"): with a dtype mapping, the
+    # pandas engine fails on a blank cell in any integer column
+    if stream:
+        # Block-by-block parse: starts converting before the whole file is read and peaks
+        # lower than read_csv on large files. All batches are still held until to_pandas.
+        reader = pacsv.open_csv(path, convert_options=arrow_convert_options(),
+                                read_options=pacsv.ReadOptions(block_size=ARROW_BLOCK_BYTES))
+        table = pa.Table.from_batches(list(reader), schema=reader.schema)
+    else:
+        table = pacsv.read_csv(path, convert_options=arrow_convert_options())
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+def read_csv_chunked(path, options):
+    # Fallback large-file read: each chunk is parsed straight into its compact dtypes, so
+    # the file never exists as one frame of raw strings. This lowers peak memory but does
+    # not bound it; the chunks plus the concatenated result hold about twice the final
+    # frame. Categorical columns get a shared category set so they stay categorical.
+    chunks = list(pd.read_csv(path, chunksize=CSV_CHUNK_ROWS, **options))
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            categories = union_categoricals([chunk[col] for chunk in chunks]).categories
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
 
 def load_data():
     if os.path.exists(DATA_PATH):
         print(f"Loading dataset from {DATA_PATH}")
-        df = pd.read_csv(DATA_PATH, parse_dates=["order_date"])
+        df = read_sales_csv(DATA_PATH)
     elif os.path.exists(SAMPLE_PATH):
         print(f"No cleaned_sales.csv found. Using sample at {SAMPLE_PATH}")
-        df = pd.read_csv(SAMPLE_PATH, parse_dates=["order_date"])
+        df = read_sales_csv(SAMPLE_PATH)
     else:
         raise FileNotFoundError("No dataset found. Put your cleaned CSV at data/cleaned_sales.csv")
 
@@ -32,19 +114,62 @@ def load_data():
     df.columns = [c.strip() for c in df.columns]
     if "revenue" not in df.columns and {"quantity", "price"}.issubset(df.columns):
         df["revenue"] = df["quantity"] * df["price"]
-
-    # Ensure hour and weekday exist
+    # 32-bit numerics halve the bytes moved by the groupby/sum loops. A quantity column
+    # with blanks can't be an int, so it stays numeric as float32 instead of failing the load.
+    for col, dtype in (("revenue", "float32"), ("quantity", "int32"), ("price", "float32")):
+        if col in df.columns:
+            if dtype == "int32" and not df[col].notna().all():
+                dtype = "float32"
+            df[col] = df[col].astype(dtype)
+
+    # Low-cardinality dimensions as categoricals: groupby/isin work on integer codes.
+    # The id columns too, so the distinct-count KPIs count codes instead of hashing strings.
+    for col in ("country", "category", "product_name", "order_id", "product_id"):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    # Ensure hour and weekday exist (falls back to format inference if DATE_FORMAT did not match)
     if "order_date" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["order_date"]):
         df["order_date"] = pd.to_datetime(df["order_date"], errors="coerce")
-    df["order_hour"] = df["order_date"].dt.hour.fillna(-1).astype(int)
-    df["order_weekday"] = df["order_date"].dt.day_name()
-    return df.dropna(subset=["order_date"])  # drop rows with missing date
+    # Stored as small integers (weekday 0=Monday); names are only mapped in at render time
+    df["order_hour"] = df["order_date"].dt.hour.fillna(-1).astype("int8")
+    df["order_weekday"] = df["order_date"].dt.dayofweek.fillna(-1).astype("int8")
+    df = df.dropna(subset=["order_date"])  # drop rows with missing date
+    # Sort by date and index on it so date filters are a binary-search slice
+    df = df.sort_values("order_date", kind="stable")
+    df.index = pd.DatetimeIndex(df["order_date"]).rename(None)
+    return df
 
 df = load_data()
 
 # Choose default filters
 available_countries = sorted(df['country'].dropna().unique().tolist())
 available_categories = sorted(df['category'].dropna().unique().tolist()) if "category" in df.columns else []
+DEFAULT_COUNTRY = available_countries if len(available_countries) <= 3 else [available_countries[0]]
+DEFAULT_CATEGORY = [] if available_categories else None
+DATE_MIN = df["order_date"].min().date()
+DATE_MAX = df["order_date"].max().date()
+
+# Inverted index: sorted row positions for every country/category, so point filters
+# become array unions/intersections instead of full-column scans
+country_rows = df.groupby("country", observed=True).indices
+category_rows = df.groupby("category", observed=True).indices if "category" in df.columns else {}
+_NO_ROWS = np.array([], dtype=np.intp)
+
+# Distinct counts for the unfiltered data, reused whenever the filters select every row
+ORDER_COL = "order_id" if "order_id" in df.columns else None
+PRODUCT_COL = "product_id" if "product_id" in df.columns else "product_name"
+TOTAL_ORDERS = df[ORDER_COL].nunique() if ORDER_COL else len(df)
+TOTAL_PRODUCTS = df[PRODUCT_COL].nunique()
+
+# Monthly revenue pre-aggregated per (country, category) column, over every month in
+# the data, so the time series scales with the number of months rather than rows
+_cube_dims = ["country", "category"] if "category" in df.columns else ["country"]
+# dropna=False keeps rows with a missing country/category as their own (NaN) columns: they
+# count when that dimension is unfiltered and isin() excludes them otherwise, as for the rows
+monthly_cube = (df.groupby(_cube_dims + [pd.Grouper(key="order_date", freq="MS")], observed=True, dropna=False)["revenue"].sum()
+                .unstack(level=list(range(len(_cube_dims))), fill_value=0))
+monthly_cube = monthly_cube.reindex(pd.date_range(monthly_cube.index.min(), monthly_cube.index.max(), freq="MS"), fill_value=0)
 
 # Use a Bootstrap theme and the local assets/custom.css for styling
 external_scripts = [
@@ -69,19 +194,19 @@ controls = html.Div([
     html.H5("Filters"),
     html.Label("Country"),
     dcc.Dropdown(id="country-dropdown", options=[{"label": c, "value": c} for c in available_countries],
-                 value=available_countries if len(available_countries) <= 3 else [available_countries[0]],
+                 value=DEFAULT_COUNTRY,
                  multi=True, placeholder="Select country..."),
     html.Br(),
     html.Label("Category"),
     dcc.Dropdown(id="category-dropdown", options=[{"label": c, "value": c} for c in available_categories],
-                 value=[] if available_categories else None,
+                 value=DEFAULT_CATEGORY,
                  multi=True, placeholder="Select category..."),
     html.Br(),
     html.Label("Date range"),
     dcc.DatePickerRange(
         id="date-picker",
-        start_date=df["order_date"].min().date(),
-        end_date=df["order_date"].max().date(),
+        start_date=DATE_MIN,
+        end_date=DATE_MAX,
         display_format="YYYY-MM-DD",
     ),
     html.Hr(),
@@ -125,15 +250,14 @@ summary_row = dbc.Row([
 ], className="mb-3")
 
 # Graph columns
+# One chart per tab, so only the visible figure has to be built and rendered
 graphs = html.Div([
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="top-products"), md=6),
-        dbc.Col(dcc.Graph(id="sales-by-country"), md=6),
+    dcc.Tabs(id="chart-tabs", value="products", children=[
+        dcc.Tab(dcc.Graph(id="top-products"), label="Products", value="products"),
+        dcc.Tab(dcc.Graph(id="sales-by-country"), label="Countries", value="countries"),
+        dcc.Tab(dcc.Graph(id="revenue-time"), label="Revenue over time", value="time"),
+        dcc.Tab(dcc.Graph(id="hour-heatmap"), label="Hour vs weekday", value="heatmap"),
     ]),
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="revenue-time"), md=6),
-        dbc.Col(dcc.Graph(id="hour-heatmap"), md=6),
-    ], className="mt-3")
 ], style={"marginTop": "10px"})
 
 # Data preview controls and table
@@ -164,9 +288,225 @@ app.layout = dbc.Container([
         ], md=9)
     ], align="start", className="g-3")
     , tooltips
+    , dcc.Store(id="filtered-store")
 ], fluid=True)
 
 
+# Filtering and aggregation.
+# The expensive work (masking + groupbys) runs once per filter change in
+# `filter_data` and is shared with the chart/KPI callbacks through a dcc.Store.
+# (key, frame) of the last filter, swapped with a single assignment so threaded
+# requests never see a key paired with another filter's rows
+_filter_cache = (None, None)
+
+def filter_key(selected_countries, selected_categories, start_date, end_date):
+    # Hashable, order-independent key for a set of filter inputs.
+    # Both dropdowns are multi=True, so Dash always sends a list (or None when cleared).
+    return (tuple(sorted(selected_countries or ())), tuple(sorted(selected_categories or ())), start_date, end_date)
+
+def filter_frame(key):
+    # Filtered rows for a filter key; the last result is cached so export_csv
+    # can reuse the one computed for the charts.
+    global _filter_cache
+    cached_key, cached_frame = _filter_cache
+    if cached_key == key:
+        return cached_frame
+    countries, categories, start_date, end_date = key
+    # df is sorted on its DatetimeIndex, so the date range is a binary-search slice [lo, hi)
+    lo = df.index.searchsorted(pd.Timestamp(start_date), side="left") if start_date else 0
+    hi = df.index.searchsorted(pd.Timestamp(end_date) + pd.Timedelta(days=1), side="right") if end_date else len(df)
+
+    rows = None
+    if countries:
+        # Countries are disjoint, so their union is a concatenate + sort
+        rows = np.sort(np.concatenate([country_rows.get(c, _NO_ROWS) for c in countries]))
+    if categories:
+        cat_rows = np.sort(np.concatenate([category_rows.get(c, _NO_ROWS) for c in categories]))
+        rows = cat_rows if rows is None else np.intersect1d(rows, cat_rows, assume_unique=True)
+
+    if rows is None:
+        dff = df.iloc[lo:hi]
+    else:
+        # Row positions are sorted, so the date window is another binary search
+        dff = df.take(rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)])
+    _filter_cache = (key, dff)
+    return dff
+
+def apply_filters(selected_countries, selected_categories, start_date, end_date):
+    # Filtered frame for raw callback inputs, through the same cached path as filter_data
+    return filter_frame(filter_key(selected_countries, selected_categories, start_date, end_date))
+
+def for_display(dff):
+    # Map encoded columns back to readable values for the table and CSV export
+    return dff.assign(order_weekday=WEEKDAY_NAMES[dff["order_weekday"].to_numpy()])
+
+def for_table(dff):
+    # for_display plus float32 -> float64 at each value's shortest float32 repr, since widening
+    # directly would show 1234.56 as 1234.56005859375 (to_csv already writes the short form)
+    out = for_display(dff)
+    for col in out.columns[(out.dtypes == "float32").to_numpy()]:
+        out[col] = pd.to_numeric(out[col].astype(str))
+    return out
+
+def distinct_count(values):
+    # Number of distinct values in a categorical column, computed on its integer codes
+    codes = values.cat.codes.to_numpy()
+    codes = codes[codes >= 0]  # -1 marks missing values
+    n_categories = len(values.cat.categories)
+    if len(codes) * 16 < n_categories:
+        # Few rows against many categories (e.g. order ids): sort the codes instead
+        return len(np.unique(codes))
+    return int(np.count_nonzero(np.bincount(codes, minlength=n_categories)))
+
+def monthly_revenue(dff, countries, categories):
+    # Monthly revenue for the filtered rows, read from monthly_cube
+    if dff.empty:
+        return pd.DataFrame({"order_date": pd.DatetimeIndex([]), "revenue": np.array([], dtype="float32")})
+    dates = dff["order_date"].to_numpy()  # dff keeps df's date order
+    first_m = dff["order_date"].iloc[0].to_period("M").to_timestamp()
+    last_m = dff["order_date"].iloc[-1].to_period("M").to_timestamp()
+
+    cols = np.ones(monthly_cube.shape[1], dtype=bool)
+    if countries:
+        cols &= monthly_cube.columns.get_level_values("country").isin(countries)
+    if categories:
+        cols &= monthly_cube.columns.get_level_values("category").isin(categories)
+    revenue = monthly_cube.loc[first_m:last_m].to_numpy()[:, cols].sum(axis=1)
+
+    # Months strictly inside the range are fully covered by the date filter; the first
+    # and last month may be cut by it, so those two are summed from the filtered rows
+    row_revenue = dff["revenue"].to_numpy()
+    revenue[0] = row_revenue[:np.searchsorted(dates, (first_m + pd.offsets.MonthBegin(1)).to_datetime64())].sum()
+    revenue[-1] = row_revenue[np.searchsorted(dates, last_m.to_datetime64()):].sum()
+
+    months = pd.date_range(first_m, last_m, freq="MS")
+    return pd.DataFrame({"order_date": months, "revenue": revenue})
+
+def compute_aggregates(dff, countries=(), categories=()):
+    # Everything the charts and KPIs need, as a JSON-serializable dict
+    # nlargest is a partial selection, cheaper than sorting every product to keep 10
+    top_products = dff.groupby("product_name", observed=True)["revenue"].sum().nlargest(10).reset_index()
+    sales_country = dff.groupby("country", observed=True)["revenue"].sum().sort_values(ascending=False).reset_index()
+    time_series = monthly_revenue(dff, countries, categories)
+    # Epoch milliseconds: plotly reads these natively on a date axis, no datetime conversion needed
+    time_series["order_date"] = time_series["order_date"].to_numpy().astype("datetime64[ms]").astype("int64")
+
+    pivot = dff.groupby(["order_hour", "order_weekday"])["revenue"].sum().unstack(fill_value=0)
+    pivot.columns = WEEKDAY_NAMES[pivot.columns.to_numpy()]
+
+    total_revenue = dff["revenue"].to_numpy().sum(dtype=np.float64)  # accumulate in float64 for the headline total
+    if len(dff) == len(df):
+        total_orders, unique_products = TOTAL_ORDERS, TOTAL_PRODUCTS
+    else:
+        total_orders = distinct_count(dff[ORDER_COL]) if ORDER_COL else len(dff)
+        unique_products = distinct_count(dff[PRODUCT_COL])
+    aov = total_revenue / total_orders if total_orders else 0
+
+    return {
+        "top": top_products.to_dict("list"),
+        "country": sales_country.to_dict("list"),
+        "time": time_series.to_dict("list"),
+        "pivot": pivot.to_dict("split"),
+        "kpis": {
+            "revenue": float(total_revenue),
+            "orders": int(total_orders),
+            "aov": float(aov),
+            "products": int(unique_products),
+            "rows": len(dff),
+            "start": str(dff["order_date"].min().date()) if not dff.empty else "-",
+            "end": str(dff["order_date"].max().date()) if not dff.empty else "-",
+            "countries": int(dff["country"].nunique()),
+        },
+    }
+
+
+# Chart figures from the aggregates produced by compute_aggregates.
+# Traces are built with graph_objects from numpy arrays (skipping px's dataframe
+# handling), and the time series uses the WebGL scatter trace.
+def build_top_figure(data):
+    # Top products by revenue
+    top = data["top"]
+    fig_top = go.Figure(go.Bar(x=np.asarray(top["revenue"]), y=np.asarray(top["product_name"]), orientation="h"))
+    fig_top.update_layout(title="Top 10 Products by Revenue", xaxis_title="Revenue", yaxis_title="Product",
+                          yaxis={'categoryorder':'total ascending'}, margin={"l":200})
+    return fig_top
+
+def build_country_figure(data):
+    # Sales by country
+    country = data["country"]
+    fig_country = go.Figure(go.Bar(x=np.asarray(country["country"]), y=np.asarray(country["revenue"])))
+    fig_country.update_layout(title="Sales by Country", xaxis_title="Country", yaxis_title="Revenue")
+    return fig_country
+
+def build_time_figure(data):
+    # Revenue over time (monthly)
+    time_series = data["time"]
+    if not time_series["order_date"]:
+        fig_time = go.Figure()
+        fig_time.update_layout(title="Revenue Over Time (monthly) — No data for selected filters")
+    else:
+        fig_time = go.Figure(go.Scattergl(x=np.asarray(time_series["order_date"], dtype="int64"),
+                                          y=np.asarray(time_series["revenue"]), mode="lines"))
+        fig_time.update_layout(title="Revenue Over Time (monthly)", xaxis_title="Month", yaxis_title="Revenue",
+                               xaxis_type="date")
+    return fig_time
+
+def build_heatmap_figure(data):
+    # Heatmap: hour vs weekday (counts)
+    pivot = data["pivot"]
+    if not pivot["data"]:
+        fig_heat = go.Figure(go.Heatmap(z=[[0]]))
+        fig_heat.update_layout(title="Hourly Heatmap — No data")
+    else:
+        fig_heat = go.Figure(go.Heatmap(z=np.asarray(pivot["data"]), x=np.asarray(pivot["columns"]),
+                                        y=np.asarray(pivot["index"]), colorbar={"title": {"text": "Revenue"}}))
+        # Hour 0 at the top, as in an image/table view
+        fig_heat.update_layout(title="Revenue heatmap: Hour vs Weekday", xaxis_title="Weekday", yaxis_title="Hour",
+                               yaxis={"autorange": "reversed"})
+    return fig_heat
+
+# Chart tab value -> figure builder, in the order of update_charts' figure outputs
+CHART_BUILDERS = {
+    "products": build_top_figure,
+    "countries": build_country_figure,
+    "time": build_time_figure,
+    "heatmap": build_heatmap_figure,
+}
+
+# Memoized per filter key, so toggling filters back and forth reuses earlier results.
+# Cached values are shared between callbacks and must not be mutated.
+@functools.lru_cache(maxsize=64)
+def _compute(countries_key, categories_key, start, end):
+    return compute_aggregates(filter_frame((countries_key, categories_key, start, end)), countries_key, categories_key)
+
+
+@app.callback(
+    Output("filtered-store", "data"),
+    Output('preview-table', 'columns'),
+    Output('preview-table', 'data'),
+    Input("country-dropdown", "value"),
+    Input("category-dropdown", "value"),
+    Input("date-picker", "start_date"),
+    Input("date-picker", "end_date"),
+    State("preview-rows", "value"),
+)
+def filter_data(selected_countries, selected_categories, start_date, end_date, preview_rows):
+    key = filter_key(selected_countries, selected_categories, start_date, end_date)
+    dff = filter_frame(key)
+
+    # Prepare preview table
+    try:
+        n_preview = int(preview_rows) if preview_rows else 10
+    except Exception:
+        n_preview = 10
+    # head() first, so only the previewed rows are copied and converted for display
+    preview_df = for_table(dff.head(n_preview))
+    table_columns = [{'name': c, 'id': c} for c in preview_df.columns]
+    table_data = preview_df.to_dict('records')
+
+    return _compute(*key), table_columns, table_data
+
+
 @app.callback(
     Output("top-products", "figure"),
     Output("sales-by-country", "figure"),
@@ -176,74 +516,34 @@ app.layout = dbc.Container([
     Output("kpi-orders", "children"),
     Output("kpi-aov", "children"),
     Output("kpi-products", "children"),
-    Output('preview-table', 'columns'),
-    Output('preview-table', 'data'),
     Output('summary-rows', 'children'),
     Output('summary-start', 'children'),
     Output('summary-end', 'children'),
     Output('summary-countries', 'children'),
-    Input("country-dropdown", "value"),
-    Input("category-dropdown", "value"),
-    Input("date-picker", "start_date"),
-    Input("date-picker", "end_date"),
-    State("preview-rows", "value"),
+    Input("filtered-store", "data"),
+    Input("chart-tabs", "value"),
 )
-def update_charts(selected_countries, selected_categories, start_date, end_date, preview_rows):
-    # Normalize inputs to lists
-    dff = df.copy()
-    if selected_countries:
-        if not isinstance(selected_countries, list):
-            selected_countries = [selected_countries]
-        dff = dff[dff["country"].isin(selected_countries)]
-    if selected_categories:
-        if not isinstance(selected_categories, list):
-            selected_categories = [selected_categories]
-        dff = dff[dff["category"].isin(selected_categories)]
-    if start_date:
-        dff = dff[dff["order_date"] >= pd.to_datetime(start_date)]
-    if end_date:
-        dff = dff[dff["order_date"] <= pd.to_datetime(end_date) + pd.Timedelta(days=1)]
-
-    # Top products by revenue
-    top_products = (dff.groupby("product_name")["revenue"].sum().reset_index().sort_values("revenue", ascending=False).head(10))
-    fig_top = px.bar(top_products, x="revenue", y="product_name", orientation="h", title="Top 10 Products by Revenue",
-                     labels={"revenue": "Revenue", "product_name": "Product"})
-    fig_top.update_layout(yaxis={'categoryorder':'total ascending'}, margin={"l":200})
-
-    # Sales by country
-    sales_country = dff.groupby("country")["revenue"].sum().reset_index().sort_values("revenue", ascending=False)
-    fig_country = px.bar(sales_country, x="country", y="revenue", title="Sales by Country",
-                         labels={"revenue": "Revenue", "country": "Country"})
-
-    # Revenue over time (monthly)
-    time_series = dff.set_index("order_date").resample("M")["revenue"].sum().reset_index()
-    if time_series.empty:
-        fig_time = px.line(title="Revenue Over Time (monthly) — No data for selected filters")
-    else:
-        fig_time = px.line(time_series, x="order_date", y="revenue", title="Revenue Over Time (monthly)",
-                           labels={"order_date": "Month", "revenue": "Revenue"})
-
-    # Heatmap: hour vs weekday (counts)
-    pivot = pd.pivot_table(dff, index="order_hour", columns="order_weekday", values="revenue", aggfunc="sum", fill_value=0)
-    # Ensure weekday order
-    weekdays = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
-    pivot = pivot.reindex(columns=[c for c in weekdays if c in pivot.columns])
-    if pivot.empty:
-        fig_heat = px.imshow([[0]], title="Hourly Heatmap — No data")
-    else:
-        fig_heat = px.imshow(pivot, labels={"x":"Weekday", "y":"Hour", "color":"Revenue"},
-                             x=pivot.columns, y=pivot.index, title="Revenue heatmap: Hour vs Weekday")
+def update_charts(data, active_tab):
+    if not data:
+        raise PreventUpdate
+    # Figures are built from the aggregates in the store, so any worker can render them without
+    # re-running the filter. Only the visible tab's figure is built; the others are filled in
+    # when their tab is opened. The store is client data, so nothing built from it is cached.
+    fig_top, fig_country, fig_time, fig_heat = (build(data) if chart == active_tab else no_update
+                                                for chart, build in CHART_BUILDERS.items())
+    if ctx.triggered_id == "chart-tabs":
+        # Switching tabs does not change the filters, so the KPIs stay as they are
+        return (fig_top, fig_country, fig_time, fig_heat) + (no_update,) * 8
 
     # KPIs
-    total_revenue = dff["revenue"].sum()
-    total_orders = dff["order_id"].nunique() if "order_id" in dff.columns else len(dff)
-    aov = total_revenue / total_orders if total_orders else 0
-    unique_products = dff["product_id"].nunique() if "product_id" in dff.columns else dff["product_name"].nunique()
+    kpis = data["kpis"]
+    total_revenue = kpis["revenue"]
+    aov = kpis["aov"]
 
     kpi_rev = f"${total_revenue:,.0f}"
-    kpi_ord = f"{int(total_orders):,}"
+    kpi_ord = f"{int(kpis['orders']):,}"
     kpi_aov = f"${aov:,.2f}"
-    kpi_prod = f"{int(unique_products):,}"
+    kpi_prod = f"{int(kpis['products']):,}"
 
     # Wrap KPIs in spans with classes for colorized CSS
     rev_span = html.Span(kpi_rev, className=("kpi-number positive" if total_revenue >= 0 else "kpi-number negative"))
@@ -251,22 +551,8 @@ def update_charts(selected_countries, selected_categories, start_date, end_date,
     aov_span = html.Span(kpi_aov, className=("kpi-number positive" if aov >= 0 else "kpi-number negative"))
     prod_span = html.Span(kpi_prod, className="kpi-number")
 
-    # Prepare preview table
-    try:
-        n_preview = int(preview_rows) if preview_rows else 10
-    except Exception:
-        n_preview = 10
-    preview_df = dff.copy().head(n_preview)
-    table_columns = [{'name': c, 'id': c} for c in preview_df.columns]
-    table_data = preview_df.to_dict('records')
-
-    # Summary values
-    total_rows = len(dff)
-    start_dt = dff["order_date"].min().date() if not dff.empty else "-"
-    end_dt = dff["order_date"].max().date() if not dff.empty else "-"
-    countries_count = dff["country"].nunique()
-
-    return fig_top, fig_country, fig_time, fig_heat, rev_span, ord_span, aov_span, prod_span, table_columns, table_data, f"{total_rows}", str(start_dt), str(end_dt), f"{countries_count}"
+    return (fig_top, fig_country, fig_time, fig_heat, rev_span, ord_span, aov_span, prod_span,
+            f"{kpis['rows']}", kpis["start"], kpis["end"], f"{kpis['countries']}")
 
 
 # Reset filters
@@ -281,14 +567,8 @@ def reset_filters(n_clicks):
     # Return defaults when button clicked; if never clicked, do not change (Dash requires a return)
     if not n_clicks:
         # No-op: return current defaults matching initialization
-        return (available_countries if len(available_countries) <= 3 else [available_countries[0]],
-                [] if available_categories else None,
-                df["order_date"].min().date(),
-                df["order_date"].max().date())
-    return (available_countries if len(available_countries) <= 3 else [available_countries[0]],
-            [] if available_categories else None,
-            df["order_date"].min().date(),
-            df["order_date"].max().date())
+        return DEFAULT_COUNTRY, DEFAULT_CATEGORY, DATE_MIN, DATE_MAX
+    return DEFAULT_COUNTRY, DEFAULT_CATEGORY, DATE_MIN, DATE_MAX
 
 
 # Export filtered data as CSV
@@ -304,21 +584,13 @@ def reset_filters(n_clicks):
 def export_csv(n_clicks, selected_countries, selected_categories, start_date, end_date):
     if not n_clicks:
         raise PreventUpdate
-    dff = df.copy()
-    if selected_countries:
-        if not isinstance(selected_countries, list):
-            selected_countries = [selected_countries]
-        dff = dff[dff["country"].isin(selected_countries)]
-    if selected_categories:
-        if not isinstance(selected_categories, list):
-            selected_categories = [selected_categories]
-        dff = dff[dff["category"].isin(selected_categories)]
-    if start_date:
-        dff = dff[dff["order_date"] >= pd.to_datetime(start_date)]
-    if end_date:
-        dff = dff[dff["order_date"] <= pd.to_datetime(end_date) + pd.Timedelta(days=1)]
-
-    return dcc.send_data_frame(dff.to_csv, "filtered_sales.csv", index=False)
+    dff = apply_filters(selected_countries, selected_categories, start_date, end_date)
+
+    export_df = for_display(dff)
+    # Write gzip-compressed CSV straight into Dash's buffer in row chunks; repetitive
+    # sales data compresses several-fold, cutting the download size
+    return dcc.send_bytes(lambda buf: export_df.to_csv(buf, index=False, chunksize=100_000, compression="gzip"),
+                          "filtered_sales.csv.gz")
 
 if __name__ == "__main__":
     app.run(debug=True, port=8050)